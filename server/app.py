@@ -1,15 +1,39 @@
 import os
 import asyncio
-import json
+import math
 import time
 import logging
-from typing import Optional, List
-
+from collections import OrderedDict, deque
+from typing import Deque, Optional, List, Tuple
+
+# transcriptions allowed to run at once across all connections; concurrent
+# CPU inference thrashes caches and slows every request down
+MAX_CONCURRENT_INFER = int(os.getenv("MAX_CONCURRENT_INFER", "1"))
+# Split the cores between concurrently decoding sessions instead of letting
+# every decode spawn a thread per core. Only MAX_CONCURRENT_INFER decodes run
+# at once, so that is the default split; override both together. OpenMP/MKL
+# read these when the native libraries load, so they must be set before the
+# imports below.
+CONCURRENT_SESSIONS = int(os.getenv("CONCURRENT_SESSIONS", str(MAX_CONCURRENT_INFER)))
+CPU_THREADS = max(1, (os.cpu_count() or 4) // CONCURRENT_SESSIONS)
+os.environ.setdefault("OMP_NUM_THREADS", str(CPU_THREADS))
+os.environ.setdefault("MKL_NUM_THREADS", str(CPU_THREADS))
+if os.getenv("PIN_CPU_THREADS", "0") == "1" and hasattr(os, "sched_setaffinity"):
+    # Linux only; threads started later (CTranslate2's pool) inherit this
+    os.sched_setaffinity(0, range(CPU_THREADS))
+
+import ctranslate2
 import numpy as np
+import orjson
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, File, UploadFile, Form
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from faster_whisper import WhisperModel
+from faster_whisper import BatchedInferencePipeline, WhisperModel
+from faster_whisper.audio import pad_or_trim
+from faster_whisper.tokenizer import Tokenizer
+from faster_whisper.vad import VadOptions, get_speech_timestamps, get_vad_model, merge_segments
+
+import audio_kernels
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -20,6 +44,13 @@ APP_PORT = int(os.getenv("PORT", "8020"))
 APP_HOST = os.getenv("HOST", "0.0.0.0")
 # tiny, base, small, medium, large-v3, etc.
 MODEL_SIZE = os.getenv("WHISPER_MODEL", "base")
+# int8 weights halve memory traffic vs float16/float32; activations stay
+# in float16 on GPU
+COMPUTE_TYPE = os.getenv(
+    "COMPUTE_TYPE",
+    "int8_float16" if ctranslate2.get_cuda_device_count() > 0 else "int8")
+# parallel transcriptions served by the single loaded model
+NUM_WORKERS = int(os.getenv("NUM_WORKERS", "2"))
 LANG_DEFAULT = os.getenv("LANG", "en")
 SAMPLE_RATE = 16000  # expected input sample rate (Hz)
 # throttle partial decoding (higher for remote)
@@ -30,6 +61,34 @@ PARTIAL_WINDOW_SEC = float(os.getenv("PARTIAL_WINDOW_SEC", "6.0"))
 SILENCE_SECONDS = float(os.getenv("SILENCE_SECONDS", "3.0"))
 # RMS threshold for silence in Int16 units
 SILENCE_RMS = float(os.getenv("SILENCE_RMS", "200.0"))
+# chunk is silent when its sum of squares is below this times its length
+SILENCE_SUMSQ_PER_SAMPLE = SILENCE_RMS * SILENCE_RMS
+# recently decoded partial windows remembered per session
+PARTIAL_CACHE_SIZE = 8
+# drop partial text the model flags as non-speech (faster-whisper defaults)
+NO_SPEECH_THRESHOLD = 0.6
+LOG_PROB_THRESHOLD = -1.0
+# Whisper log-mel STFT parameters (25 ms window, 10 ms hop)
+N_FFT = 400
+HOP_LENGTH = 160
+# partials fall back to extracting features from raw audio when the
+# background mel worker lags the buffer by more than this many frames; it
+# is normally about one client chunk behind when a partial starts
+MEL_MAX_LAG_FRAMES = 30
+# Silero VAD runs on each new block of this much audio as it arrives, with
+# some already-processed audio before it so speech spanning blocks joins up
+VAD_BLOCK_SEC = 2.0
+VAD_CONTEXT_SEC = 1.0
+# same settings BatchedInferencePipeline uses for its own vad_filter
+VAD_OPTIONS = VadOptions(max_speech_duration_s=30, min_silence_duration_ms=160)
+# audio history per session; oldest audio is dropped beyond this
+MAX_BUFFER_SEC = float(os.getenv("MAX_BUFFER_SEC", "300.0"))
+# newest audio kept as raw Int16 for partials, mel and VAD; older audio is
+# archived in ARCHIVE_BLOCK_SEC blocks, silent ones as 8-bit mu-law
+LIVE_BUFFER_SEC = min(MAX_BUFFER_SEC, max(30.0, 2 * PARTIAL_WINDOW_SEC))
+ARCHIVE_BLOCK_SEC = 0.1
+# VAD chunks decoded together by the batched pipeline for final transcripts
+BATCH_SIZE = int(os.getenv("BATCH_SIZE", "8"))
 
 app = FastAPI(title="Voice-to-Text Streaming ASR")
 
@@ -43,29 +102,165 @@ app.add_middleware(
 )
 
 _model: Optional[WhisperModel] = None
+_batched_model: Optional[BatchedInferencePipeline] = None
 _model_lock = asyncio.Lock()
+_infer_sem = asyncio.Semaphore(MAX_CONCURRENT_INFER)
+_stft_window = np.hanning(N_FFT + 1)[:-1].astype(np.float32)
 
 
 @app.on_event("startup")
 async def startup_event():
     """Preload the model on startup to reduce first-request latency"""
-    logger.info(f"Preloading Whisper model: {MODEL_SIZE}")
+    logger.info(f"Preloading Whisper model: {MODEL_SIZE} ({COMPUTE_TYPE})")
     start_time = time.time()
     await get_model()
+    get_vad_model()
+    # Compile the audio kernels now rather than on the first audio chunk
+    audio_kernels.warmup()
     load_time = time.time() - start_time
     logger.info(f"Model loaded in {load_time:.2f}s")
 
 
 async def get_model() -> WhisperModel:
-    global _model
+    global _model, _batched_model
     if _model is None:
         async with _model_lock:
             if _model is None:
                 # device="auto" will use CUDA if available, else CPU
-                _model = WhisperModel(MODEL_SIZE, device="auto")
+                _model = WhisperModel(
+                    MODEL_SIZE,
+                    device="auto",
+                    compute_type=COMPUTE_TYPE,
+                    cpu_threads=CPU_THREADS,
+                    num_workers=NUM_WORKERS,
+                )
+                _batched_model = BatchedInferencePipeline(model=_model)
     return _model
 
 
+async def get_batched_model() -> BatchedInferencePipeline:
+    """Batched pipeline sharing the loaded model, used for full-length decodes"""
+    await get_model()
+    return _batched_model
+
+
+def is_silent(pcm: np.ndarray) -> bool:
+    """True when the RMS of Int16 samples is below SILENCE_RMS.
+
+    The peak scan settles most chunks without the full reduction: RMS never
+    exceeds the peak, so all samples under the threshold means silence, and
+    one sample with x**2 >= threshold**2 * n already puts RMS over it.
+    Otherwise the integer sum of squares is compared instead of taking
+    sqrt(mean(x**2)), accumulated in int64 (int32 overflows past ~1k loud
+    samples); einsum casts in small buffers so no full-size temp is made.
+    """
+    level = audio_kernels.peak_level(pcm, SILENCE_RMS, SILENCE_RMS * math.sqrt(pcm.size))
+    if level >= 0:
+        return level == 0
+    sumsq = int(np.einsum("i,i->", pcm, pcm, dtype=np.int64))
+    return sumsq < SILENCE_SUMSQ_PER_SAMPLE * pcm.size
+
+
+def add_speech_region(regions: List[Tuple[int, int]], start: int, end: int) -> None:
+    """Append a (start, end) sample range to sorted regions, merging overlaps"""
+    if regions and start <= regions[-1][1]:
+        regions[-1] = (regions[-1][0], max(regions[-1][1], end))
+    else:
+        regions.append((start, end))
+
+
+def speech_clips(regions: List[Tuple[int, int]]) -> List[dict]:
+    """Group speech regions into the batched pipeline's clip_timestamps.
+
+    Clips are in samples and at most 30 s long, merged the same way its own
+    vad_filter does. Regions joined across VAD blocks can outgrow that, so
+    they are split first.
+    """
+    max_len = int(VAD_OPTIONS.max_speech_duration_s * SAMPLE_RATE)
+    segments = [
+        {"start": pos, "end": min(end, pos + max_len)}
+        for start, end in regions
+        for pos in range(start, end, max_len)
+    ]
+    return merge_segments(segments, VAD_OPTIONS)
+
+
+def pcm16_to_float32(pcm: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Scale Int16 PCM to float32 in [-1, 1) through a precomputed lookup table.
+
+    Writes into out[:pcm.size] when a scratch buffer is given.
+    """
+    out = np.empty(pcm.size, dtype=np.float32) if out is None else out[:pcm.size]
+    audio_kernels.lut_convert(pcm, audio_kernels.I16_TO_F32, out)
+    return out
+
+
+def log_mel_frames(audio_f32: np.ndarray, mel_filters: np.ndarray) -> np.ndarray:
+    """Unnormalized log10 mel frames for every HOP_LENGTH step of audio_f32.
+
+    audio_f32 must carry N_FFT // 2 samples of context around the first and
+    last frame centers, so frames computed from consecutive slices line up.
+    Whisper's clamp/scale depends on the window maximum and is applied later
+    by the caller.
+    """
+    frames = np.lib.stride_tricks.sliding_window_view(audio_f32, N_FFT)[::HOP_LENGTH]
+    stft = np.fft.rfft(frames * _stft_window, axis=-1)
+    magnitudes = stft.real ** 2 + stft.imag ** 2
+    mel_spec = mel_filters @ magnitudes.T
+    return np.log10(np.maximum(mel_spec, 1e-10)).astype(np.float32)
+
+
+def detect_language(model: WhisperModel, features: np.ndarray) -> str:
+    """Language of one log-mel window, for sessions started without a lang.
+
+    Tokenizer needs a concrete language for multilingual models, so partials
+    detect it once and reuse it for the rest of the session.
+    """
+    if not model.model.is_multilingual:
+        return "en"
+    language, _, _ = model.detect_language(features=features)
+    return language
+
+
+def decode_features(model: WhisperModel, features: np.ndarray, language: Optional[str]) -> str:
+    """Greedy single-pass decode of one log-mel window of at most 30 s.
+
+    Calls the encoder and decoder directly, skipping transcribe()'s segment
+    seeking, beam search and temperature fallback, none of which a
+    throwaway partial needs.
+    """
+    tokenizer = Tokenizer(
+        model.hf_tokenizer, model.model.is_multilingual, task="transcribe", language=language)
+    prompt = model.get_prompt(tokenizer, [], without_timestamps=True)
+    encoder_output = model.encode(pad_or_trim(features))
+    result = model.model.generate(
+        encoder_output,
+        [prompt],
+        beam_size=1,
+        max_length=model.max_length,
+        return_scores=True,
+        return_no_speech_prob=True,
+    )[0]
+    tokens = result.sequences_ids[0]
+    avg_logprob = result.scores[0] * len(tokens) / (len(tokens) + 1)
+    if result.no_speech_prob > NO_SPEECH_THRESHOLD and avg_logprob < LOG_PROB_THRESHOLD:
+        return ""
+    return tokenizer.decode(tokens).strip()
+
+
+async def run_transcribe(model, audio_f32: np.ndarray, **kwargs):
+    """Transcribe in a worker thread so the event loop keeps serving sockets.
+
+    Segments are generated lazily, so they are consumed inside the thread too.
+    Returns the joined text and the transcription info.
+    """
+    def _run():
+        segments, info = model.transcribe(audio_f32, **kwargs)
+        return "".join(seg.text for seg in segments).strip(), info
+
+    return await asyncio.to_thread(_run)
+
+
 @app.get("/health")
 async def health():
     return JSONResponse({"status": "ok", "model": MODEL_SIZE})
@@ -89,18 +284,19 @@ async def transcribe_audio(
         audio_np = np.frombuffer(audio_data, dtype=np.int16)
 
         # Convert to float32 for Whisper
-        audio_f32 = (audio_np.astype(np.float32) / 32768.0).copy()
+        audio_f32 = pcm16_to_float32(audio_np)
 
         # Transcribe
-        model = await get_model()
-        segments, info = model.transcribe(
-            audio_f32,
-            language=lang if lang != "auto" else None,
-            vad_filter=True,
-            without_timestamps=True
-        )
-
-        text = "".join(seg.text for seg in segments).strip()
+        batched = await get_batched_model()
+        async with _infer_sem:
+            text, info = await run_transcribe(
+                batched,
+                audio_f32,
+                language=lang if lang != "auto" else None,
+                vad_filter=True,
+                without_timestamps=True,
+                batch_size=BATCH_SIZE
+            )
         processing_time = time.time() - start_time
 
         logger.info(
@@ -127,65 +323,306 @@ async def ws_asr(ws: WebSocket):
 
     # Session state
     lang = LANG_DEFAULT
-    buffer = np.zeros((0,), dtype=np.int16)
+    buffer = np.empty(int(LIVE_BUFFER_SEC * SAMPLE_RATE), dtype=np.int16)
+    write_pos = 0  # number of valid samples in buffer
+    # Audio that aged out of buffer, oldest first: Int16 blocks with speech,
+    # uint8 mu-law blocks for silence. base is the session sample index of
+    # buffer[0], so the archive starts at base - archived.
+    archive: Deque[np.ndarray] = deque()
+    archived = 0
+    base = 0
+    # float32 copies handed to the model, one per decode path since the
+    # partial worker runs alongside the receive loop
+    audio_scratch = np.empty(int(MAX_BUFFER_SEC * SAMPLE_RATE), dtype=np.float32)
+    partial_scratch = np.empty(int(PARTIAL_WINDOW_SEC * SAMPLE_RATE), dtype=np.float32)
     running = True
     last_partial_ts = 0.0
+    last_partial_pos = 0  # write_pos when the last partial was decoded
+    last_sent_partial = ""
+    detected_lang: Optional[str] = None  # partial language when lang is None
+    partial_cache: "OrderedDict[int, str]" = OrderedDict()  # window fingerprint -> text
     started = False
     silent_samples = 0  # count consecutive silent samples
     session_start = time.time()
+    # Log-mel frames computed in the background as audio arrives; column i
+    # holds the frame centered on sample (mel_first + i) * HOP_LENGTH
+    mel: Optional[np.ndarray] = None
+    mel_first = 0
+    mel_pos = 0  # next frame index to compute
+    buffer_epoch = 0  # bumped when the buffer is trimmed and indices shift
+    audio_ready = asyncio.Event()
+
+    async def mel_worker():
+        nonlocal mel, mel_first, mel_pos
+        try:
+            model = await get_model()
+            mel_filters = model.feature_extractor.mel_filters
+            half = N_FFT // 2
+            window_frames = int(PARTIAL_WINDOW_SEC * SAMPLE_RATE) // HOP_LENGTH + 1
+            mel = np.empty((mel_filters.shape[0], 2 * window_frames), dtype=np.float32)
+            seg_scratch = np.empty((mel.shape[1] - 1) * HOP_LENGTH + N_FFT, dtype=np.float32)
+            while True:
+                await audio_ready.wait()
+                audio_ready.clear()
+                # Frames whose whole analysis window has arrived
+                end = (write_pos - half) // HOP_LENGTH + 1 if write_pos >= half else 0
+                if end <= mel_pos:
+                    continue
+                cap = mel.shape[1]
+                if end - mel_pos > cap:
+                    # Older frames would be discarded anyway, skip them
+                    mel_first = mel_pos = end - cap
+                lo = mel_pos * HOP_LENGTH - half
+                hi = (end - 1) * HOP_LENGTH + half
+                seg = seg_scratch[:hi - lo]
+                pad = max(0, -lo)
+                # Session start: zero context before the first sample
+                seg[:pad] = 0.0
+                pcm16_to_float32(buffer[lo + pad:hi], out=seg[pad:])
+                epoch = buffer_epoch
+                frames = await asyncio.to_thread(log_mel_frames, seg, mel_filters)
+                if epoch != buffer_epoch:
+                    # Buffer was trimmed meanwhile; start over on new indices
+                    audio_ready.set()
+                    continue
+
+                count = frames.shape[1]
+                if count >= cap:
+                    mel[:] = frames[:, -cap:]
+                    mel_first = end - cap
+                else:
+                    used = mel_pos - mel_first
+                    if used + count > cap:
+                        # Keep only the newest frames that partials still need
+                        keep = min(used, cap - count)
+                        mel[:, :keep] = mel[:, used - keep:used]
+                        used = keep
+                    mel[:, used:used + count] = frames
+                    mel_first = end - used - count
+                mel_pos = end
+        except Exception as e:
+            logger.error(f"Mel worker failed: {e}")
+
+    def archive_audio(pcm: np.ndarray):
+        """Move samples leaving the live buffer into the archive"""
+        nonlocal archived
+        block_size = int(ARCHIVE_BLOCK_SEC * SAMPLE_RATE)
+        for i in range(0, pcm.size, block_size):
+            block = pcm[i:i + block_size]
+            if is_silent(block):
+                codes = np.empty(block.size, dtype=np.uint8)
+                audio_kernels.ulaw_encode(block, codes)
+                archive.append(codes)
+            else:
+                archive.append(block.copy())
+            archived += block.size
+        if archived + buffer.size > audio_scratch.size:
+            while archive and archived + buffer.size > audio_scratch.size:
+                archived -= archive.popleft().size
+            logger.warning(
+                f"Audio history exceeded {MAX_BUFFER_SEC:.0f}s, dropping oldest audio")
+
+    def history_float32() -> np.ndarray:
+        """The whole retained session audio as float32, in audio_scratch"""
+        audio_f32 = audio_scratch[:archived + write_pos]
+        pos = 0
+        for block in archive:
+            out = audio_f32[pos:pos + block.size]
+            if block.dtype == np.uint8:
+                np.take(audio_kernels.ULAW_TO_F32, block, out=out)
+            else:
+                pcm16_to_float32(block, out=out)
+            pos += block.size
+        pcm16_to_float32(buffer[:write_pos], out=audio_f32[pos:])
+        return audio_f32
+
+    # Speech found by the VAD worker, as sorted (start, end) session samples;
+    # audio from vad_pos on has not been checked yet
+    speech_regions: List[Tuple[int, int]] = []
+    vad_pos = 0
+    vad_ready = asyncio.Event()
+
+    async def vad_worker():
+        nonlocal vad_pos
+        try:
+            block = int(VAD_BLOCK_SEC * SAMPLE_RATE)
+            context = int(VAD_CONTEXT_SEC * SAMPLE_RATE)
+            vad_scratch = np.empty(block + context, dtype=np.float32)
+            while True:
+                await vad_ready.wait()
+                vad_ready.clear()
+                if vad_pos < base:
+                    # Archived before it was checked; treat it as speech
+                    add_speech_region(speech_regions, vad_pos, base)
+                    vad_pos = base
+                if base + write_pos - vad_pos < block:
+                    continue
+                start = max(base, vad_pos - context)
+                end = vad_pos + block
+                audio_f32 = pcm16_to_float32(buffer[start - base:end - base], out=vad_scratch)
+                timestamps = await asyncio.to_thread(get_speech_timestamps, audio_f32, VAD_OPTIONS)
+                for ts in timestamps:
+                    add_speech_region(speech_regions, start + ts["start"], start + ts["end"])
+                vad_pos = end
+                # Catch up if more than a block arrived meanwhile
+                vad_ready.set()
+        except Exception as e:
+            logger.error(f"VAD worker failed: {e}")
+
+    def window_features(start: int, end: int) -> Optional[np.ndarray]:
+        """Normalized log-mel for buffer[start:end] from the mel worker's
+        frames, or None if they are not available yet."""
+        first = -(-start // HOP_LENGTH)
+        last = end // HOP_LENGTH
+        if mel is None or first < mel_first or mel_pos < last - MEL_MAX_LAG_FRAMES:
+            return None
+        log_spec = mel[:, first - mel_first:min(last, mel_pos) - mel_first]
+        if log_spec.shape[1] == 0:
+            return None
+        log_spec = np.maximum(log_spec, log_spec.max() - 8.0)
+        return (log_spec + 4.0) / 4.0
 
     async def decode_partial():
-        nonlocal last_partial_ts
+        nonlocal last_partial_ts, last_partial_pos, last_sent_partial, detected_lang
         now = asyncio.get_event_loop().time()
         if now - last_partial_ts < PARTIAL_INTERVAL_SEC:
             return
-        last_partial_ts = now
 
+        # Snapshot the buffer end; ingest keeps appending while we decode
+        pos = write_pos
+        epoch = buffer_epoch
         # Use only the last PARTIAL_WINDOW_SEC seconds for partial decoding
         samples_window = int(PARTIAL_WINDOW_SEC * SAMPLE_RATE)
-        if buffer.size <= 0:
+        if pos <= 0:
+            return
+        # Every chunk since the last partial was silent: its text still
+        # stands, and it has already been sent
+        if 0 < last_partial_pos <= pos and silent_samples >= pos - last_partial_pos:
+            last_partial_ts = now
             return
-        chunk = buffer[-samples_window:]
+        chunk = buffer[max(0, pos - samples_window):pos]
         if chunk.size < int(0.5 * SAMPLE_RATE):  # require at least 0.5 sec
             return
-        audio_f32 = (chunk.astype(np.float32) / 32768.0).copy()
-        try:
-            decode_start = time.time()
-            model = await get_model()
-            # Use no_speech_threshold to reduce hallucinations; disable vad_filter for speed
-            segments, info = model.transcribe(
-                audio_f32, language=lang, vad_filter=False, without_timestamps=True)
-            text = "".join(seg.text for seg in segments).strip()
-            decode_time = time.time() - decode_start
-            if text:
+
+        # Fingerprint a few samples per second rather than hashing the
+        # whole window on every tick
+        key = hash(chunk[::SAMPLE_RATE // 4].tobytes())
+        text = partial_cache.get(key)
+        if text is not None:
+            partial_cache.move_to_end(key)
+            last_partial_ts = now
+        else:
+            # Drop rather than queue partials while the model is busy; a
+            # fresher window will be decoded once it frees up
+            if _infer_sem.locked():
+                return
+            last_partial_ts = now
+            features = window_features(pos - chunk.size, pos)
+            if features is None:
+                audio_f32 = pcm16_to_float32(chunk, out=partial_scratch)
+            try:
+                decode_start = time.time()
+                model = await get_model()
+                if features is None:
+                    features = await asyncio.to_thread(model.feature_extractor, audio_f32)
+                # Another session may have taken the model during the
+                # awaits above; nothing may await between here and acquire
+                if _infer_sem.locked():
+                    return
+                async with _infer_sem:
+                    language = lang
+                    if language is None:
+                        if detected_lang is None:
+                            detected_lang = await asyncio.to_thread(detect_language, model, features)
+                        language = detected_lang
+                    text = await asyncio.to_thread(decode_features, model, features, language)
+                decode_time = time.time() - decode_start
                 logger.debug(
                     f"Partial decode: {decode_time:.3f}s, text: '{text[:50]}...'")
-                await ws.send_text(json.dumps({"type": "partial", "text": text}))
-        except Exception as e:
-            logger.error(f"Partial decode failed: {e}")
-            await ws.send_text(json.dumps({"type": "error", "message": f"partial_decode_failed: {e}"}))
+            except Exception as e:
+                logger.error(f"Partial decode failed: {e}")
+                await ws.send_text(orjson.dumps({"type": "error", "message": f"partial_decode_failed: {e}"}).decode())
+                return
+            partial_cache[key] = text
+            if len(partial_cache) > PARTIAL_CACHE_SIZE:
+                partial_cache.popitem(last=False)
+        # Positions from before a buffer trim no longer line up
+        last_partial_pos = pos if epoch == buffer_epoch else 0
+
+        if text and text != last_sent_partial:
+            last_sent_partial = text
+            await ws.send_text(orjson.dumps({"type": "partial", "text": text}).decode())
 
     async def decode_final():
-        if buffer.size == 0:
-            await ws.send_text(json.dumps({"type": "final", "text": ""}))
+        total = archived + write_pos
+        if total == 0:
+            await ws.send_text(orjson.dumps({"type": "final", "text": ""}).decode())
             return
-        audio_f32 = (buffer.astype(np.float32) / 32768.0).copy()
+        # Speech already located by the VAD worker, relative to the start of
+        # the retained history
+        start = base - archived
+        regions = [(max(s, start) - start, e - start) for s, e in speech_regions if e > start]
+        if vad_pos < base:
+            # Archived before it was checked; treat it as speech
+            add_speech_region(regions, max(vad_pos, start) - start, base - start)
+        # The tail the worker hasn't reached is silence after an auto-stop, so
+        # check it too rather than handing Whisper a clip of nothing
+        tail = max(vad_pos, base)
+        if base + write_pos > tail:
+            lead = max(base, tail - int(VAD_CONTEXT_SEC * SAMPLE_RATE))
+            tail_f32 = pcm16_to_float32(buffer[lead - base:write_pos], out=audio_scratch)
+            timestamps = await asyncio.to_thread(get_speech_timestamps, tail_f32, VAD_OPTIONS)
+            for ts in timestamps:
+                add_speech_region(regions, lead + ts["start"] - start, lead + ts["end"] - start)
+        if not regions:
+            await ws.send_text(orjson.dumps({"type": "final", "text": ""}).decode())
+            return
+        audio_f32 = history_float32()
         try:
             decode_start = time.time()
-            model = await get_model()
-            segments, info = model.transcribe(
-                audio_f32, language=lang, vad_filter=True, without_timestamps=True)
-            text = "".join(seg.text for seg in segments).strip()
+            batched = await get_batched_model()
+            async with _infer_sem:
+                text, info = await run_transcribe(
+                    batched, audio_f32, language=lang, vad_filter=False,
+                    clip_timestamps=speech_clips(regions), without_timestamps=True,
+                    batch_size=BATCH_SIZE)
             decode_time = time.time() - decode_start
             session_time = time.time() - session_start
             logger.info(
                 f"Final decode: {decode_time:.3f}s, session: {session_time:.1f}s, text: '{text[:100]}'")
-            await ws.send_text(json.dumps({"type": "final", "text": text}))
+            await ws.send_text(orjson.dumps({"type": "final", "text": text}).decode())
         except Exception as e:
             logger.error(f"Final decode failed: {e}")
-            await ws.send_text(json.dumps({"type": "error", "message": f"final_decode_failed: {e}"}))
+            await ws.send_text(orjson.dumps({"type": "error", "message": f"final_decode_failed: {e}"}).decode())
+
+    partial_wake = asyncio.Event()  # single-slot mailbox: "new audio arrived"
+    partials_enabled = True
+
+    async def partial_worker():
+        # Decodes the newest audio whenever woken; wake-ups that arrive while
+        # a decode runs collapse into one, so at most one partial is pending
+        while partials_enabled:
+            await partial_wake.wait()
+            partial_wake.clear()
+            if not partials_enabled:
+                break
+            try:
+                await decode_partial()
+            except Exception as e:
+                logger.error(f"Partial worker failed: {e}")
+                break
+
+    async def stop_partials():
+        """Let an in-flight partial finish so it can't arrive after the final"""
+        nonlocal partials_enabled
+        partials_enabled = False
+        partial_wake.set()
+        await partial_task
 
-    await ws.send_text(json.dumps({"type": "ready"}))
+    mel_task = asyncio.create_task(mel_worker())
+    vad_task = asyncio.create_task(vad_worker())
+    partial_task = asyncio.create_task(partial_worker())
+    await ws.send_text(orjson.dumps({"type": "ready"}).decode())
 
     try:
         while running:
@@ -196,25 +633,26 @@ async def ws_asr(ws: WebSocket):
 
             if "text" in msg and msg["text"] is not None:
                 try:
-                    data = json.loads(msg["text"])
+                    data = orjson.loads(msg["text"])
                 except Exception:
-                    await ws.send_text(json.dumps({"type": "error", "message": "invalid_json"}))
+                    await ws.send_text(orjson.dumps({"type": "error", "message": "invalid_json"}).decode())
                     continue
 
                 dtype = data.get("type")
                 if dtype == "start":
                     if started:
-                        await ws.send_text(json.dumps({"type": "error", "message": "already_started"}))
+                        await ws.send_text(orjson.dumps({"type": "error", "message": "already_started"}).decode())
                         continue
                     sr = int(data.get("sampleRate", SAMPLE_RATE))
                     if sr != SAMPLE_RATE:
-                        await ws.send_text(json.dumps({"type": "error", "message": f"unsupported_sample_rate:{sr}"}))
+                        await ws.send_text(orjson.dumps({"type": "error", "message": f"unsupported_sample_rate:{sr}"}).decode())
                         await ws.close()
                         break
                     lang = data.get("lang", LANG_DEFAULT)
                     started = True
-                    await ws.send_text(json.dumps({"type": "started", "sampleRate": SAMPLE_RATE, "lang": lang}))
+                    await ws.send_text(orjson.dumps({"type": "started", "sampleRate": SAMPLE_RATE, "lang": lang}).decode())
                 elif dtype == "stop":
+                    await stop_partials()
                     await decode_final()
                     running = False
                     break
@@ -222,20 +660,37 @@ async def ws_asr(ws: WebSocket):
                     running = False
                     break
                 else:
-                    await ws.send_text(json.dumps({"type": "error", "message": "unknown_control_message"}))
+                    await ws.send_text(orjson.dumps({"type": "error", "message": "unknown_control_message"}).decode())
 
             elif "bytes" in msg and msg["bytes"] is not None:
                 if not started:
-                    await ws.send_text(json.dumps({"type": "error", "message": "not_started"}))
+                    await ws.send_text(orjson.dumps({"type": "error", "message": "not_started"}).decode())
                     continue
-                # Expect Int16LE PCM
-                chunk = np.frombuffer(msg["bytes"], dtype=np.int16)
+                # Expect Int16LE PCM; zero-copy view, a trailing odd byte is ignored
+                payload = msg["bytes"]
+                chunk = np.frombuffer(payload, dtype=np.int16, count=len(payload) // 2)
                 if chunk.size == 0:
                     continue
-                buffer = np.concatenate([buffer, chunk])
-                # Silence detection based on RMS over incoming chunk
-                # Convert to float32 to avoid overflow when squaring
-                rms = float(np.sqrt(np.mean((chunk.astype(np.float32)) ** 2)))
+                n = chunk.size
+                if write_pos + n > buffer.size:
+                    # Live buffer full: archive the older half and keep the
+                    # rest with one memmove rather than shifting per chunk
+                    if n > buffer.size:
+                        chunk = chunk[-buffer.size:]
+                        n = chunk.size
+                    keep = min(write_pos, buffer.size // 2, buffer.size - n)
+                    moved = write_pos - keep
+                    archive_audio(buffer[:moved])
+                    buffer[:keep] = buffer[moved:write_pos]
+                    write_pos = keep
+                    base += moved
+                    last_partial_pos = 0
+                    buffer_epoch += 1
+                    mel_first = mel_pos = 0
+                # Append and measure RMS for silence detection in one pass
+                rms, write_pos = audio_kernels.ingest(buffer, write_pos, chunk)
+                audio_ready.set()
+                vad_ready.set()
                 if rms < SILENCE_RMS:
                     silent_samples += chunk.size
                 else:
@@ -243,20 +698,24 @@ async def ws_asr(ws: WebSocket):
 
                 if silent_samples >= int(SILENCE_SECONDS * SAMPLE_RATE):
                     # Auto-stop due to extended silence
+                    await stop_partials()
                     await decode_final()
                     running = False
                     break
-                # Schedule partial decode (throttled)
-                await decode_partial()
+                # Hand off to the partial worker (throttled there)
+                partial_wake.set()
 
     except WebSocketDisconnect:
         pass
     except Exception as e:
         try:
-            await ws.send_text(json.dumps({"type": "error", "message": f"server_exception: {e}"}))
+            await ws.send_text(orjson.dumps({"type": "error", "message": f"server_exception: {e}"}).decode())
         except Exception:
             pass
     finally:
+        mel_task.cancel()
+        vad_task.cancel()
+        partial_task.cancel()
         try:
             await ws.close()
         except Exception:
@@ -265,5 +724,16 @@ async def ws_asr(ws: WebSocket):
 
 # Entrypoint for `python app.py` (dev convenience)
 if __name__ == "__main__":
+    import sys
     import uvicorn
-    uvicorn.run("app:app", host=APP_HOST, port=APP_PORT, reload=False)
+    uvicorn.run(
+        "app:app",
+        host=APP_HOST,
+        port=APP_PORT,
+        reload=False,
+        # uvloop keeps socket reads in libuv; it is not available on Windows
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        ws="websockets",
+        workers=int(os.getenv("UVICORN_WORKERS", "1")),
+    )